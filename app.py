@@ -4,6 +4,7 @@ import signal
 import subprocess
 import sys
 import threading
+import time
 
 import rumps
 
@@ -15,17 +16,23 @@ else:
     # Development: bot modules are in bot/ subdirectory
     sys.path.insert(0, os.path.join(os.path.dirname(__file__), "bot"))
 
-from config import get_discord_token, set_discord_token
+from config import (
+    get_discord_token,
+    get_settings,
+    librespot_bitrate_for,
+    on_settings_changed,
+    set_discord_token,
+    watch_config,
+)
+from librespot_log import LibrespotLogIngestor
 from state import state
 
 logging.basicConfig(
-    level=logging.INFO,
+    level=get_settings().log_level,
     format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
 )
 log = logging.getLogger("pyjockie.app")
-
-FIFO_PATH = "/tmp/pyjockie.fifo"
-EVENT_PORT = 8080
+on_settings_changed(lambda old, new: logging.getLogger().setLevel(new.log_level))
 
 
 def _find_resource(name: str) -> str:
@@ -55,24 +62,37 @@ class PyJockieApp(rumps.App):
         )
 
         self._librespot_proc: subprocess.Popen | None = None
+        self._librespot_bitrate: int | None = None
+        self._librespot_reader: threading.Thread | None = None
+        # Serialises librespot stop/start between the UI thread and bitrate switches
+        self._librespot_lock = threading.Lock()
+        self._switching_bitrate = False
+        self._librespot_log = LibrespotLogIngestor()
         self._bot_thread: threading.Thread | None = None
         self._running = False
+        # Settings the running services were started with
+        self._settings = get_settings()
+        watch_config()
 
         # Menu items
         self._status_item = rumps.MenuItem("Not running", callback=None)
         self._status_item.set_callback(None)
         self._track_item = rumps.MenuItem("", callback=None)
         self._track_item.set_callback(None)
+        self._health_item = rumps.MenuItem("", callback=None)
+        self._health_item.set_callback(None)
 
         self.menu = [
             self._status_item,
             self._track_item,
+            self._health_item,
             None,  # separator
             rumps.MenuItem("Start Streaming", callback=self._on_start),
             rumps.MenuItem("Stop Streaming", callback=self._on_stop),
             rumps.MenuItem("Restart", callback=self._on_restart),
             None,
             rumps.MenuItem("Open Spotify", callback=self._on_open_spotify),
+            rumps.MenuItem("Show librespot Log", callback=self._on_show_log),
             None,
             rumps.MenuItem("Quit", callback=self._on_quit),
         ]
@@ -83,14 +103,26 @@ class PyJockieApp(rumps.App):
         if not self._running:
             self._status_item.title = "Not running"
             self._track_item.title = ""
+            self._health_item.title = ""
             return
 
-        # Check if librespot is still alive
-        if self._librespot_proc and self._librespot_proc.poll() is not None:
-            log.warning("librespot exited unexpectedly (code %d)", self._librespot_proc.returncode)
+        health = state.health
+        self._health_item.title = (
+            f"Underruns {health.librespot_underruns} \u00b7 "
+            f"Reconnects {health.librespot_reconnects} \u00b7 "
+            f"Errors {health.librespot_errors} \u00b7 "
+            f"ffmpeg restarts {health.ffmpeg_restarts}"
+        )
+
+        # Check if librespot is still alive (it is briefly down while switching bitrate)
+        proc = self._librespot_proc
+        if not self._switching_bitrate and proc and proc.poll() is not None:
+            log.warning("librespot exited unexpectedly (code %d)", proc.returncode)
             self._status_item.title = "\u274c librespot crashed"
             return
 
+        self._check_bitrate()
+
         # Update track info
         track = state.current_track
         if track and track.name:
@@ -133,11 +165,48 @@ class PyJockieApp(rumps.App):
 
     def _ensure_fifo(self):
         """Create the FIFO if it doesn't exist."""
-        if not os.path.exists(FIFO_PATH):
-            os.mkfifo(FIFO_PATH)
-            log.info("Created FIFO at %s", FIFO_PATH)
+        fifo_path = self._settings.fifo_path
+        if not os.path.exists(fifo_path):
+            os.mkfifo(fifo_path)
+            log.info("Created FIFO at %s", fifo_path)
+
+    def _check_bitrate(self):
+        """Renegotiate librespot quality to match the voice channel we're streaming into."""
+        if self._switching_bitrate or state.voice_bitrate is None or self._librespot_bitrate is None:
+            return
+        wanted = librespot_bitrate_for(state.voice_bitrate, self._settings.librespot_bitrate)
+        if wanted == self._librespot_bitrate:
+            return
+        # librespot can't change bitrate in place, and restarting it drops the Spotify
+        # Connect session, so only switch while no device session is active
+        if state.session_active:
+            return
+        log.info(
+            "Voice channel bitrate is %d kbps, switching librespot from %d to %d kbps",
+            state.voice_bitrate // 1000, self._librespot_bitrate, wanted,
+        )
+        self._switching_bitrate = True
+        threading.Thread(
+            target=self._switch_bitrate,
+            args=(wanted,),
+            daemon=True,
+            name="librespot-bitrate",
+        ).start()
 
-    def _start_librespot(self):
+    def _switch_bitrate(self, bitrate: int):
+        """Restart librespot at a new quality. Runs off the UI thread: stopping can take seconds."""
+        try:
+            with self._librespot_lock:
+                if not self._running:
+                    return
+                self._stop_librespot()
+                self._start_librespot(bitrate)
+        except Exception:
+            log.exception("Failed to restart librespot at %d kbps", bitrate)
+        finally:
+            self._switching_bitrate = False
+
+    def _start_librespot(self, bitrate: int | None = None):
         """Start the librespot subprocess."""
         librespot_bin = _find_resource("librespot")
         ffmpeg_bin = _find_resource("ffmpeg")
@@ -145,14 +214,18 @@ class PyJockieApp(rumps.App):
         # Ensure ffmpeg is on PATH for the audio module
         os.environ["PATH"] = os.path.dirname(ffmpeg_bin) + ":" + os.environ.get("PATH", "")
 
-        log.info("Starting librespot: %s", librespot_bin)
+        if bitrate is None:
+            bitrate = librespot_bitrate_for(state.voice_bitrate, self._settings.librespot_bitrate)
+        self._librespot_bitrate = bitrate
+
+        log.info("Starting librespot: %s (%d kbps)", librespot_bin, bitrate)
         self._librespot_proc = subprocess.Popen(
             [
                 librespot_bin,
                 "--name", "PyJockie",
                 "--backend", "pipe",
-                "--device", FIFO_PATH,
-                "--bitrate", "320",
+                "--device", self._settings.fifo_path,
+                "--bitrate", str(bitrate),
                 "--format", "S16",
                 "--verbose",
             ],
@@ -161,22 +234,14 @@ class PyJockieApp(rumps.App):
         )
 
         # Read librespot stderr in a background thread to prevent pipe deadlock
-        # and surface any errors in our logs
-        threading.Thread(
-            target=self._log_librespot_stderr,
+        # and turn it into stream-health counters
+        self._librespot_reader = threading.Thread(
+            target=self._librespot_log.run,
+            args=(self._librespot_proc.stderr,),
             daemon=True,
             name="librespot-stderr",
-        ).start()
-
-    def _log_librespot_stderr(self):
-        """Forward librespot stderr to our logger."""
-        proc = self._librespot_proc
-        if not proc or not proc.stderr:
-            return
-        for line in proc.stderr:
-            text = line.decode("utf-8", errors="replace").rstrip()
-            if text:
-                log.info("[librespot] %s", text)
+        )
+        self._librespot_reader.start()
 
     def _start_bot(self, token: str):
         """Start the Discord bot on a background thread."""
@@ -184,16 +249,13 @@ class PyJockieApp(rumps.App):
 
         self._bot_thread = threading.Thread(
             target=run_bot_async,
-            args=(token, FIFO_PATH, EVENT_PORT),
+            args=(token, self._settings.fifo_path, self._settings.event_port),
             daemon=True,
             name="discord-bot",
         )
         self._bot_thread.start()
 
-    def _stop_all(self):
-        """Stop librespot and the bot."""
-        self._running = False
-
+    def _stop_librespot(self):
         if self._librespot_proc:
             log.info("Stopping librespot...")
             self._librespot_proc.terminate()
@@ -201,7 +263,22 @@ class PyJockieApp(rumps.App):
                 self._librespot_proc.wait(timeout=5)
             except subprocess.TimeoutExpired:
                 self._librespot_proc.kill()
+                self._librespot_proc.wait()
             self._librespot_proc = None
+        # The shared ingestor must finish draining the old stderr before a new run() starts
+        if self._librespot_reader:
+            self._librespot_reader.join(timeout=5)
+            if self._librespot_reader.is_alive():
+                log.warning("librespot stderr reader did not finish draining")
+            self._librespot_reader = None
+        self._librespot_bitrate = None
+
+    def _stop_all(self):
+        """Stop librespot and the bot."""
+        self._running = False
+
+        with self._librespot_lock:
+            self._stop_librespot()
 
         # Bot thread is a daemon — it dies when we stop the bot
         from bot import bot
@@ -212,17 +289,19 @@ class PyJockieApp(rumps.App):
                 asyncio.run_coroutine_threadsafe(bot.close(), loop)
 
         # Clean up FIFO
-        if os.path.exists(FIFO_PATH):
+        if os.path.exists(self._settings.fifo_path):
             try:
-                os.remove(FIFO_PATH)
+                os.remove(self._settings.fifo_path)
             except OSError:
                 pass
 
         # Reset state
         state.is_playing = False
         state.is_streaming = False
+        state.session_active = False
         state.current_track = None
         state.voice_channel_id = None
+        state.voice_bitrate = None
         state.guild_id = None
 
         log.info("All services stopped")
@@ -238,8 +317,10 @@ class PyJockieApp(rumps.App):
             return
 
         try:
+            self._settings = get_settings()
             self._ensure_fifo()
-            self._start_librespot()
+            with self._librespot_lock:
+                self._start_librespot()
             self._start_bot(token)
             self._running = True
             log.info("PyJockie started")
@@ -261,6 +342,17 @@ class PyJockieApp(rumps.App):
     def _on_open_spotify(self, _):
         os.system("open -a Spotify")
 
+    def _on_show_log(self, _):
+        events = [
+            f"{time.strftime('%H:%M:%S', time.localtime(e.timestamp))} {e.kind}: {e.message}"
+            for e in self._librespot_log.recent_events()[-10:]
+        ]
+        lines = self._librespot_log.recent_lines()[-15:]
+        rumps.alert(
+            title="librespot",
+            message="\n".join(["Recent events:", *(events or ["(none)"]), "", "Recent output:", *lines]),
+        )
+
     def _on_quit(self, _):
         self._stop_all()
         rumps.quit_application()
@@ -0,0 +1,87 @@
+"""Synthetic-stream benchmark for librespot quality tiers.
+
+Encodes a synthetic stereo stream as Ogg Vorbis at each librespot bitrate
+(the format Spotify serves), then decodes it to 44.1kHz S16 PCM the way
+librespot does before writing to our FIFO. Reports download size and decode
+CPU per tier, and what the channel-aware selection saves for common Discord
+voice channel bitrates. Requires ffmpeg built with libvorbis.
+
+    python bench/bitrate_tiers.py --seconds 300 --runs 5
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "bot"))
+
+from config import BITRATES, librespot_bitrate_for
+
+CHANNEL_BITRATES = (64_000, 96_000, 128_000, 256_000, 384_000)
+
+
+def _encode(path: str, seconds: int, kbps: int):
+    # Pink noise plus a tone: dense enough that the encoder uses the full bitrate
+    subprocess.run(
+        [
+            "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+            "-f", "lavfi", "-i", f"anoisesrc=color=pink:amplitude=0.3:sample_rate=44100:duration={seconds}",
+            "-f", "lavfi", "-i", f"sine=frequency=440:sample_rate=44100:duration={seconds}",
+            "-filter_complex", "[0][1]amix=inputs=2,aformat=channel_layouts=stereo",
+            "-c:a", "libvorbis", "-b:a", f"{kbps}k",
+            path,
+        ],
+        check=True,
+    )
+
+
+def _decode_cpu(path: str) -> float:
+    """CPU seconds (user + sys) to decode path to raw PCM."""
+    before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    subprocess.run(
+        [
+            "ffmpeg", "-hide_banner", "-loglevel", "error",
+            "-i", path, "-f", "s16le", "-ar", "44100", "-ac", "2", "-y", os.devnull,
+        ],
+        check=True,
+    )
+    after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=int, default=300, help="length of the synthetic stream")
+    parser.add_argument("--runs", type=int, default=5, help="decode runs per tier (best is kept)")
+    args = parser.parse_args()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for kbps in BITRATES:
+            path = os.path.join(tmp, f"{kbps}.ogg")
+            _encode(path, args.seconds, kbps)
+            size = os.path.getsize(path)
+            cpu = min(_decode_cpu(path) for _ in range(args.runs))
+            results[kbps] = (size, cpu)
+
+    print(f"{args.seconds}s synthetic stream, best of {args.runs} decode runs")
+    print(f"{'tier':>6} {'MB/hour':>9} {'decode CPU':>11} {'CPU %':>7}")
+    for kbps, (size, cpu) in results.items():
+        per_hour = 3600 / args.seconds
+        print(f"{kbps:>4}k {size * per_hour / 1e6:>9.1f} {cpu * per_hour:>9.1f}s/h "
+              f"{cpu / args.seconds * 100:>6.2f}%")
+
+    base_size, base_cpu = results[max(BITRATES)]
+    print()
+    print(f"{'channel':>8} {'tier':>6} {'bandwidth saved':>16} {'CPU saved':>10}")
+    for channel in CHANNEL_BITRATES:
+        tier = librespot_bitrate_for(channel)
+        size, cpu = results[tier]
+        print(f"{channel // 1000:>6}k {tier:>4}k {(1 - size / base_size) * 100:>15.0f}% "
+              f"{(1 - cpu / base_cpu) * 100 if base_cpu else 0:>9.0f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""Concurrent load test for the librespot event endpoint.
+
+Replays player event sequences (recorded JSONL, one POST body per line, or
+synthesized listening sessions with skip bursts) against the real aiohttp
+handler in-process, with a configurable number of concurrent senders.
+Reports requests/sec, handler latency, event-loop lag, and checks that the
+final AppState matches the events in the order the handler applied them.
+
+    python bench/event_load.py --events 20000 --concurrency 64
+    python bench/event_load.py --payloads recorded_events.jsonl
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from dataclasses import fields
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "bot"))
+
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from bot import _handle_librespot_event
+from state import AppState, TrackInfo, state
+
+LAG_INTERVAL_SECS = 0.005
+COMPARED_FIELDS = (
+    "is_playing", "is_streaming", "session_active", "current_track",
+    "position_ms", "volume", "shuffle", "repeat",
+)
+
+
+def synthesize(count: int, seed: int = 0) -> list[dict]:
+    """Listening sessions: track loads, play/pause, volume drags and bursts of skips."""
+    rng = random.Random(seed)
+    events: list[dict] = []
+    track = 0
+
+    def track_changed():
+        nonlocal track
+        track += 1
+        events.append({
+            "PLAYER_EVENT": "track_changed",
+            "TRACK_ID": f"{track:022d}",
+            "NAME": f"Track {track}",
+            "ARTISTS": f"Artist {track % 97}",
+            "ALBUM": f"Album {track % 31}",
+            "COVERS": f"https://i.scdn.co/image/{track:040x},https://i.scdn.co/image/small",
+            "DURATION_MS": str(rng.randint(90_000, 400_000)),
+        })
+        events.append({"PLAYER_EVENT": "playing", "POSITION_MS": "0"})
+
+    while len(events) < count:
+        roll = rng.random()
+        if roll < 0.3:
+            track_changed()
+        elif roll < 0.4:
+            # Skip burst: user mashing next
+            for _ in range(rng.randint(3, 10)):
+                track_changed()
+        elif roll < 0.6:
+            position = str(rng.randint(0, 200_000))
+            events.append({"PLAYER_EVENT": "paused", "POSITION_MS": position})
+            events.append({"PLAYER_EVENT": "playing", "POSITION_MS": position})
+        elif roll < 0.85:
+            # Dragging the volume slider emits a run of updates
+            for _ in range(rng.randint(2, 8)):
+                events.append({"PLAYER_EVENT": "volume_changed", "VOLUME": str(rng.randint(0, 65535))})
+        elif roll < 0.9:
+            events.append({"PLAYER_EVENT": "shuffle_changed", "SHUFFLE": rng.choice(["true", "false"])})
+        elif roll < 0.95:
+            events.append({"PLAYER_EVENT": "repeat_changed", "REPEAT": rng.choice(["off", "context", "track"])})
+        elif roll < 0.97:
+            events.append({"PLAYER_EVENT": "preloading", "TRACK_ID": f"{track + 1:022d}"})
+        elif roll < 0.99:
+            events.append({"PLAYER_EVENT": "stopped"})
+        else:
+            # Listener switches device away and back
+            events.append({"PLAYER_EVENT": "session_disconnected"})
+            events.append({"PLAYER_EVENT": "session_connected"})
+    return events[:count]
+
+
+def load(path: str) -> list[dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def apply(model: AppState, data: dict):
+    """Reference semantics for one event, kept independent of the handler."""
+    event = data.get("PLAYER_EVENT", "")
+    if event == "track_changed":
+        covers = data.get("COVERS", "")
+        model.current_track = TrackInfo(
+            name=data.get("NAME", ""),
+            artists=data.get("ARTISTS", ""),
+            album=data.get("ALBUM", ""),
+            cover_url=covers.split(",")[0] if covers else "",
+            duration_ms=int(data.get("DURATION_MS", 0)),
+        )
+        model.session_active = True
+    elif event == "playing":
+        model.session_active = True
+        model.is_playing = model.is_streaming = True
+        model.position_ms = int(data.get("POSITION_MS", 0))
+    elif event == "paused":
+        model.session_active = True
+        model.is_playing = False
+        model.position_ms = int(data.get("POSITION_MS", 0))
+    elif event == "stopped":
+        model.is_playing = model.is_streaming = False
+        model.current_track = None
+    elif event in ("session_connected", "session_client_changed"):
+        model.session_active = True
+    elif event == "session_disconnected":
+        model.session_active = False
+        model.is_playing = False
+    elif event == "volume_changed":
+        model.volume = int(data.get("VOLUME", 100))
+    elif event == "shuffle_changed":
+        model.shuffle = str(data.get("SHUFFLE", "false")).lower() == "true"
+    elif event == "repeat_changed":
+        model.repeat = data.get("REPEAT", "off")
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def _monitor_lag(lags: list[float], stop: asyncio.Event):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + LAG_INTERVAL_SECS
+        await asyncio.sleep(LAG_INTERVAL_SECS)
+        lags.append(max(0.0, loop.time() - expected))
+
+
+async def run(events: list[dict], concurrency: int) -> dict:
+    defaults = AppState()
+    for f in fields(AppState):
+        setattr(state, f.name, getattr(defaults, f.name))
+
+    latencies: list[float] = []
+    applied: list[int] = []
+
+    @web.middleware
+    async def measure(request: web.Request, handler):
+        started = time.perf_counter()
+        response = await handler(request)
+        # No await between the handler's state update and here, so this is apply order
+        applied.append(int(request.headers["X-Seq"]))
+        latencies.append(time.perf_counter() - started)
+        return response
+
+    app = web.Application(middlewares=[measure])
+    app.router.add_post("/api/librespot-event", _handle_librespot_event)
+
+    queue: asyncio.Queue[int] = asyncio.Queue()
+    for seq in range(len(events)):
+        queue.put_nowait(seq)
+    bodies = [json.dumps(event) for event in events]
+
+    async with TestClient(TestServer(app)) as client:
+        async def sender():
+            while True:
+                try:
+                    seq = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                async with client.post(
+                    "/api/librespot-event",
+                    data=bodies[seq],
+                    headers={"Content-Type": "application/json", "X-Seq": str(seq)},
+                ) as resp:
+                    if resp.status != 200:
+                        raise RuntimeError(f"Event {seq} failed with HTTP {resp.status}")
+
+        lags: list[float] = []
+        stop = asyncio.Event()
+        monitor = asyncio.create_task(_monitor_lag(lags, stop))
+        started = time.perf_counter()
+        await asyncio.gather(*(sender() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await monitor
+
+    model = AppState()
+    for seq in applied:
+        apply(model, events[seq])
+    mismatches = {
+        name: (getattr(state, name), getattr(model, name))
+        for name in COMPARED_FIELDS
+        if getattr(state, name) != getattr(model, name)
+    }
+
+    return {
+        "requests": len(applied),
+        "elapsed_s": elapsed,
+        "latencies": latencies,
+        "lags": lags,
+        "reordered": sum(1 for i, seq in enumerate(applied) if seq != i),
+        "mismatches": mismatches,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--payloads", help="JSONL file of recorded event bodies")
+    parser.add_argument("--events", type=int, default=10_000, help="synthetic events to send")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 16, 64])
+    args = parser.parse_args()
+
+    events = load(args.payloads) if args.payloads else synthesize(args.events)
+
+    print(f"{len(events)} events")
+    print(f"{'conc':>5} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'lag p99 ms':>11} "
+          f"{'lag max ms':>11} {'reordered':>10}  state")
+    failed = False
+    for concurrency in args.concurrency:
+        r = asyncio.run(run(events, concurrency))
+        ok = not r["mismatches"] and r["requests"] == len(events)
+        failed |= not ok
+        print(f"{concurrency:>5} {r['requests'] / r['elapsed_s']:>9,.0f} "
+              f"{_percentile(r['latencies'], 50) * 1e3:>8.3f} {_percentile(r['latencies'], 99) * 1e3:>8.3f} "
+              f"{_percentile(r['lags'], 99) * 1e3:>11.2f} {max(r['lags'], default=0) * 1e3:>11.2f} "
+              f"{r['reordered']:>10}  {'consistent' if ok else 'MISMATCH'}")
+        for name, (actual, expected) in r["mismatches"].items():
+            print(f"      {name}: handler={actual!r} expected={expected!r}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
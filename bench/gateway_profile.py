@@ -0,0 +1,208 @@
+"""Compare memory per guild and gateway events processed for each gateway profile.
+
+Replays recorded gateway dispatch payloads (JSONL, one {"t": ..., "d": ...} per
+line) through discord.py's parsers locally, without connecting to Discord.
+Events the gateway would not send for a profile's intents are dropped before
+replay, just as Discord would drop them.
+
+    python bench/gateway_profile.py --record /tmp/gateway.jsonl --guilds 200
+    python bench/gateway_profile.py --payloads /tmp/gateway.jsonl
+
+Without --payloads a synthetic recording is generated in memory.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "bot"))
+
+from discord.user import ClientUser
+
+from bot import PyJockie
+
+# Intent that must be enabled for Discord to deliver each dispatch type
+EVENT_INTENTS = {
+    "GUILD_CREATE": "guilds",
+    "CHANNEL_CREATE": "guilds",
+    "VOICE_STATE_UPDATE": "voice_states",
+    "MESSAGE_CREATE": "guild_messages",
+    "PRESENCE_UPDATE": "presences",
+    "GUILD_MEMBER_ADD": "members",
+}
+
+SELF_USER = {"id": "1", "username": "PyJockie", "discriminator": "0", "avatar": None, "bot": True}
+TIMESTAMP = "2024-01-01T00:00:00+00:00"
+
+
+def _user(user_id: int) -> dict:
+    return {"id": str(user_id), "username": f"user{user_id}", "discriminator": "0", "avatar": None}
+
+
+def _member(user_id: int) -> dict:
+    return {"user": _user(user_id), "roles": [], "joined_at": TIMESTAMP, "deaf": False, "mute": False,
+            "flags": 0}
+
+
+def synthesize(guilds: int, members: int, events_per_guild: int, seed: int = 0):
+    """Yield gateway dispatches resembling a bot sitting in many busy guilds."""
+    rng = random.Random(seed)
+    next_id = 10_000
+    for g in range(guilds):
+        guild_id, text_id, voice_id = next_id, next_id + 1, next_id + 2
+        next_id += 3
+        user_ids = list(range(next_id, next_id + members))
+        next_id += members
+        yield {"t": "GUILD_CREATE", "d": {
+            "id": str(guild_id),
+            "name": f"guild{g}",
+            "owner_id": str(user_ids[0]),
+            "member_count": members,
+            "large": members > 250,
+            "unavailable": False,
+            "features": [],
+            "emojis": [],
+            "stickers": [],
+            "roles": [{
+                "id": str(guild_id), "name": "@everyone", "permissions": "0", "position": 0,
+                "color": 0, "hoist": False, "managed": False, "mentionable": False,
+            }],
+            "channels": [
+                {"id": str(text_id), "type": 0, "name": "general", "position": 0},
+                {"id": str(voice_id), "type": 2, "name": "Music", "position": 1,
+                 "bitrate": 64000, "user_limit": 0},
+            ],
+            # Discord only includes the first 250 members of a large guild
+            "members": [_member(uid) for uid in user_ids[:250]],
+            "presences": [
+                {"user": {"id": str(uid)}, "status": "online", "activities": [],
+                 "client_status": {"desktop": "online"}}
+                for uid in user_ids[:250]
+            ],
+            "voice_states": [],
+        }}
+
+        for i in range(events_per_guild):
+            uid = rng.choice(user_ids)
+            kind = rng.random()
+            if kind < 0.6:
+                yield {"t": "MESSAGE_CREATE", "d": {
+                    "id": str(next_id + i), "channel_id": str(text_id), "guild_id": str(guild_id),
+                    "author": _user(uid), "member": {k: v for k, v in _member(uid).items() if k != "user"},
+                    "content": "x" * rng.randint(5, 200), "timestamp": TIMESTAMP,
+                    "edited_timestamp": None, "tts": False, "mention_everyone": False,
+                    "mentions": [], "mention_roles": [], "attachments": [], "embeds": [],
+                    "pinned": False, "type": 0,
+                }}
+            elif kind < 0.9:
+                yield {"t": "PRESENCE_UPDATE", "d": {
+                    "user": {"id": str(uid)}, "guild_id": str(guild_id),
+                    "status": rng.choice(["online", "idle", "dnd"]), "activities": [],
+                    "client_status": {"desktop": "online"},
+                }}
+            else:
+                yield {"t": "VOICE_STATE_UPDATE", "d": {
+                    "guild_id": str(guild_id), "user_id": str(uid), "member": _member(uid),
+                    "channel_id": rng.choice([str(voice_id), None]), "session_id": "s",
+                    "deaf": False, "mute": False, "self_deaf": False, "self_mute": False,
+                    "self_video": False, "suppress": False, "request_to_speak_timestamp": None,
+                }}
+        next_id += events_per_guild
+
+
+def load(path: str) -> list[dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _filter_for(intents, dispatches: list[dict]) -> list[dict]:
+    """Drop what Discord would not send for these intents."""
+    out = []
+    for dispatch in dispatches:
+        intent = EVENT_INTENTS.get(dispatch["t"])
+        if intent is not None and not getattr(intents, intent):
+            continue
+        if dispatch["t"] == "GUILD_CREATE" and not intents.presences:
+            dispatch = {"t": "GUILD_CREATE", "d": {**dispatch["d"], "presences": []}}
+        out.append(dispatch)
+    return out
+
+
+async def replay(profile: str, dispatches: list[dict]) -> dict:
+    client = PyJockie(profile=profile)
+    # Binds the client to the running loop, as login() would
+    await client._async_setup_hook()
+    connection = client._connection
+    connection.user = ClientUser(state=connection, data=SELF_USER)
+    delivered = _filter_for(client.intents, dispatches)
+    parsers = connection.parsers
+
+    gc.collect()
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    started = time.perf_counter()
+    for dispatch in delivered:
+        parsers[dispatch["t"]](dispatch["d"])
+    elapsed = time.perf_counter() - started
+    # Let dispatched listeners (e.g. Bot.on_message) run to completion
+    pending = asyncio.all_tasks() - {asyncio.current_task()}
+    await asyncio.gather(*pending, return_exceptions=True)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    guilds = len(client.guilds) or 1
+    return {
+        "profile": profile,
+        "events_offered": len(dispatches),
+        "events_processed": len(delivered),
+        "elapsed_s": elapsed,
+        "bytes_per_guild": (current - base) / guilds,
+        "cached_members": sum(len(g.members) for g in client.guilds),
+        "cached_messages": len(client.cached_messages),
+    }
+
+
+async def run(dispatches: list[dict], profiles: list[str]) -> list[dict]:
+    # Warm up lazily-imported code paths so the first profile isn't penalised
+    await replay(profiles[0], dispatches[: min(len(dispatches), 50)])
+    return [await replay(profile, dispatches) for profile in profiles]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--payloads", help="JSONL file of recorded gateway dispatches")
+    parser.add_argument("--record", help="write a synthetic recording to this path and exit")
+    parser.add_argument("--guilds", type=int, default=100)
+    parser.add_argument("--members", type=int, default=1000)
+    parser.add_argument("--events-per-guild", type=int, default=200)
+    parser.add_argument("--profiles", nargs="+", default=["full", "lean"])
+    args = parser.parse_args()
+
+    if args.record:
+        with open(args.record, "w") as f:
+            for dispatch in synthesize(args.guilds, args.members, args.events_per_guild):
+                f.write(json.dumps(dispatch) + "\n")
+        print(f"Wrote recording to {args.record}")
+        return
+
+    if args.payloads:
+        dispatches = load(args.payloads)
+    else:
+        dispatches = list(synthesize(args.guilds, args.members, args.events_per_guild))
+
+    print(f"{'profile':<8} {'offered':>9} {'processed':>10} {'KiB/guild':>10} "
+          f"{'members':>8} {'messages':>9} {'time':>8}")
+    for r in asyncio.run(run(dispatches, args.profiles)):
+        print(f"{r['profile']:<8} {r['events_offered']:>9} {r['events_processed']:>10} "
+              f"{r['bytes_per_guild'] / 1024:>10.1f} {r['cached_members']:>8} "
+              f"{r['cached_messages']:>9} {r['elapsed_s']:>7.2f}s")
+
+
+if __name__ == "__main__":
+    main()
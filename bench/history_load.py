@@ -0,0 +1,87 @@
+"""Load test for the play-history store.
+
+Pushes plays through PlayHistory.record() as the event handler would, then
+measures /history and /top query latency against the resulting database.
+
+    python bench/history_load.py --plays 2000000 --guilds 500
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "bot"))
+
+from history import TAIL_SIZE, PlayHistory
+from state import TrackInfo
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def _report(label: str, samples: list[float]):
+    print(f"{label:<28} p50 {statistics.median(samples) * 1e6:>9.1f}us  "
+          f"p99 {_percentile(samples, 99) * 1e6:>9.1f}us  max {max(samples) * 1e6:>9.1f}us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--plays", type=int, default=1_000_000)
+    parser.add_argument("--guilds", type=int, default=200)
+    parser.add_argument("--artists", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--db", help="database path (default: a temporary file)")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    tracks = [
+        TrackInfo(name=f"Track {i}", artists=f"Artist {i % args.artists}", album=f"Album {i // 10}",
+                  duration_ms=rng.randint(90_000, 400_000))
+        for i in range(args.artists * 10)
+    ]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        history = PlayHistory(args.db or os.path.join(tmp, "history.db"))
+        history.start()
+
+        record_times = []
+        started = time.perf_counter()
+        now = time.time() - args.plays
+        for i in range(args.plays):
+            guild_id = rng.randrange(args.guilds)
+            track = rng.choice(tracks)
+            t0 = time.perf_counter()
+            history.record(guild_id, track, played_at=now + i)
+            record_times.append(time.perf_counter() - t0)
+        enqueued = time.perf_counter() - started
+        history.flush()
+        written = time.perf_counter() - started
+
+        print(f"{args.plays} plays across {args.guilds} guilds")
+        print(f"enqueued in {enqueued:.2f}s, written in {written:.2f}s "
+              f"({args.plays / written:,.0f} plays/s)")
+        _report("record()", record_times)
+
+        guilds = [rng.randrange(args.guilds) for _ in range(args.queries)]
+        for label, query in [
+            ("recent(limit=10) from tail", lambda g: history.recent(g, 10)),
+            (f"recent(limit={TAIL_SIZE + 25}) via index", lambda g: history.recent(g, TAIL_SIZE + 25)),
+            ("top_artists(limit=10)", lambda g: history.top_artists(g, 10)),
+        ]:
+            samples = []
+            for guild_id in guilds:
+                t0 = time.perf_counter()
+                query(guild_id)
+                samples.append(time.perf_counter() - t0)
+            _report(label, samples)
+
+        history.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,12 +4,13 @@ import time
 
 import discord
 
+from config import get_settings
+from state import state
+
 log = logging.getLogger(__name__)
 
 FRAME_SIZE = 3840  # 20ms at 48kHz, 16-bit, stereo
 SILENCE = b"\x00" * FRAME_SIZE
-MAX_RESTART_ATTEMPTS = 5
-RESTART_BACKOFF_SECS = 1.0
 
 
 class SpotifyAudioSource(discord.AudioSource):
@@ -46,26 +47,29 @@ class SpotifyAudioSource(discord.AudioSource):
             ],
             stdout=subprocess.PIPE,
             stderr=subprocess.DEVNULL,
+            bufsize=get_settings().buffer_frames * FRAME_SIZE,
         )
         self._restart_count = 0
 
     def _restart(self) -> bool:
         """Kill the current ffmpeg and start a new one. Returns False if backoff limit hit."""
+        settings = get_settings()
         now = time.monotonic()
 
         # Reset counter if last restart was long ago (stream was healthy)
-        if now - self._last_restart > 10.0:
+        if now - self._last_restart > settings.restart_window_secs:
             self._restart_count = 0
 
         self._restart_count += 1
         self._last_restart = now
+        state.health.ffmpeg_restarts += 1
 
-        if self._restart_count > MAX_RESTART_ATTEMPTS:
+        if self._restart_count > settings.max_restart_attempts:
             log.warning(
                 "ffmpeg restarted %d times rapidly, backing off for %.1fs",
-                self._restart_count, RESTART_BACKOFF_SECS,
+                self._restart_count, settings.restart_backoff_secs,
             )
-            time.sleep(RESTART_BACKOFF_SECS)
+            time.sleep(settings.restart_backoff_secs)
             self._restart_count = 0
 
         log.info("Restarting ffmpeg process (attempt %d)", self._restart_count)
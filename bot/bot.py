@@ -1,5 +1,6 @@
+import asyncio
 import logging
-import os
+import sqlite3
 
 import discord
 from aiohttp import web
@@ -7,12 +8,15 @@ from discord import app_commands
 from discord.ext import commands
 
 from audio import SpotifyAudioSource
+from config import Settings, get_settings, on_settings_changed
+from history import PlayHistory
+from presence import PresencePublisher
 from state import AppState, TrackInfo, state
 
 log = logging.getLogger(__name__)
 
-FIFO_PATH = os.environ.get("FIFO_PATH", "/tmp/pyjockie.fifo")
-EVENT_PORT = int(os.environ.get("EVENT_PORT", "8080"))
+FIFO_PATH = get_settings().fifo_path
+EVENT_PORT = get_settings().event_port
 
 
 def configure(fifo_path: str | None = None, event_port: int | None = None):
@@ -24,24 +28,64 @@ def configure(fifo_path: str | None = None, event_port: int | None = None):
         EVENT_PORT = event_port
 
 
-class PyJockie(commands.Bot):
-    def __init__(self):
+def gateway_options(profile: str = "lean") -> dict:
+    """Client options for a gateway profile.
+
+    "lean" subscribes only to what slash commands and voice need (guilds and
+    voice states), keeps no message cache and caches only members in voice.
+    "full" is the discord.py default intents plus message content and a "!"
+    prefix, with default caching.
+    """
+    if profile == "full":
         intents = discord.Intents.default()
         intents.message_content = True
-        super().__init__(command_prefix="!", intents=intents)
+        return {"command_prefix": "!", "intents": intents}
+    if profile != "lean":
+        raise ValueError(f"Unknown gateway profile: {profile!r}")
+
+    intents = discord.Intents.none()
+    intents.guilds = True
+    intents.voice_states = True
+    return {
+        # Prefix commands are unused; without message intents they never fire
+        "command_prefix": commands.when_mentioned,
+        "intents": intents,
+        "member_cache_flags": discord.MemberCacheFlags.from_intents(intents),
+        "max_messages": None,
+        "chunk_guilds_at_startup": False,
+    }
+
+
+class PyJockie(commands.Bot):
+    def __init__(self, profile: str | None = None):
+        settings = get_settings()
+        super().__init__(**gateway_options(profile or settings.gateway_profile))
 
         self.audio_source: SpotifyAudioSource | None = None
         self._http_runner: web.AppRunner | None = None
+        self.presence = PresencePublisher(self, settings.presence_window_secs)
+        self.history = PlayHistory(settings.history_db)
+        # Set by track_changed until the track's first "playing" event records it
+        self.track_unplayed = False
+        on_settings_changed(self._on_settings_changed)
 
     async def setup_hook(self):
         self.tree.add_command(join)
         self.tree.add_command(leave)
         self.tree.add_command(now_playing)
+        self.tree.add_command(history)
+        self.tree.add_command(top)
         await self.tree.sync()
         log.info("Slash commands synced")
 
+        try:
+            await asyncio.to_thread(self.history.start)
+        except (sqlite3.Error, OSError):
+            log.exception("Could not open play history at %s; history is disabled", self.history.path)
+
         # Start the HTTP event receiver
         await self._start_event_server()
+        self.presence.start()
 
     async def _start_event_server(self):
         app = web.Application()
@@ -54,9 +98,14 @@ class PyJockie(commands.Bot):
         self._http_runner = runner
         log.info("Librespot event server listening on port %d", EVENT_PORT)
 
+    def _on_settings_changed(self, old: Settings, new: Settings):
+        self.presence.window = new.presence_window_secs
+
     async def close(self):
+        await self.presence.stop()
         if self._http_runner:
             await self._http_runner.cleanup()
+        await asyncio.to_thread(self.history.close)
         await super().close()
 
 
@@ -69,6 +118,13 @@ async def on_ready():
     log.info("Connected to %d guild(s)", len(bot.guilds))
 
 
+@bot.event
+async def on_guild_channel_update(before: discord.abc.GuildChannel, after: discord.abc.GuildChannel):
+    # Server admins can change a voice channel's bitrate while we're in it
+    if after.id == state.voice_channel_id and isinstance(after, discord.VoiceChannel):
+        state.voice_bitrate = after.bitrate
+
+
 @app_commands.command(name="join", description="Join your voice channel and start streaming Spotify")
 async def join(interaction: discord.Interaction):
     if not interaction.user.voice or not interaction.user.voice.channel:
@@ -99,6 +155,7 @@ async def join(interaction: discord.Interaction):
             msg = f"Joined **{channel.name}**. Now select **PyJockie** as your Spotify device."
 
         state.voice_channel_id = channel.id
+        state.voice_bitrate = channel.bitrate
         state.guild_id = interaction.guild.id
 
         # Start audio source
@@ -133,6 +190,7 @@ async def leave(interaction: discord.Interaction):
             bot.audio_source = None
         await interaction.guild.voice_client.disconnect()
         state.voice_channel_id = None
+        state.voice_bitrate = None
         state.guild_id = None
         log.info("Disconnected from voice channel")
         await interaction.followup.send("Disconnected.")
@@ -167,6 +225,51 @@ async def now_playing(interaction: discord.Interaction):
     await interaction.response.send_message(embed=embed)
 
 
+@app_commands.command(name="history", description="Show recently played tracks in this server")
+@app_commands.describe(count="Number of tracks to show")
+@app_commands.guild_only()
+async def history(interaction: discord.Interaction, count: app_commands.Range[int, 1, 25] = 10):
+    if not bot.history.running:
+        await interaction.response.send_message("Play history is unavailable.", ephemeral=True)
+        return
+    plays = await asyncio.to_thread(bot.history.recent, interaction.guild.id, count)
+    if not plays:
+        await interaction.response.send_message("Nothing has been played here yet.", ephemeral=True)
+        return
+
+    lines = [
+        f"<t:{int(play.played_at)}:R> **{play.name}** — {play.artists}"
+        for play in plays
+    ]
+    embed = discord.Embed(
+        title="Recently played",
+        description="\n".join(lines),
+        color=discord.Color.green(),
+    )
+    await interaction.response.send_message(embed=embed)
+
+
+@app_commands.command(name="top", description="Show the most played artists in this server")
+@app_commands.describe(count="Number of artists to show")
+@app_commands.guild_only()
+async def top(interaction: discord.Interaction, count: app_commands.Range[int, 1, 25] = 10):
+    if not bot.history.running:
+        await interaction.response.send_message("Play history is unavailable.", ephemeral=True)
+        return
+    artists = await asyncio.to_thread(bot.history.top_artists, interaction.guild.id, count)
+    if not artists:
+        await interaction.response.send_message("Nothing has been played here yet.", ephemeral=True)
+        return
+
+    lines = [f"{rank}. **{name}** — {plays} play(s)" for rank, (name, plays) in enumerate(artists, 1)]
+    embed = discord.Embed(
+        title="Top artists",
+        description="\n".join(lines),
+        color=discord.Color.green(),
+    )
+    await interaction.response.send_message(embed=embed)
+
+
 async def _handle_librespot_event(request: web.Request) -> web.Response:
     """Receive player events from librespot's ONEVENT_POST_ENDPOINT."""
     try:
@@ -189,17 +292,31 @@ async def _handle_librespot_event(request: web.Request) -> web.Response:
             cover_url=covers.split(",")[0] if covers else "",
             duration_ms=int(data.get("DURATION_MS", 0)),
         )
+        state.session_active = True
+        bot.track_unplayed = True
     elif event == "playing":
+        # A track counts as played once it starts; tracks skipped while loading don't
+        if bot.track_unplayed and state.guild_id and state.current_track and state.current_track.name:
+            bot.history.record(state.guild_id, state.current_track)
+        bot.track_unplayed = False
+        state.session_active = True
         state.is_playing = True
         state.is_streaming = True
         state.position_ms = int(data.get("POSITION_MS", 0))
     elif event == "paused":
+        state.session_active = True
         state.is_playing = False
         state.position_ms = int(data.get("POSITION_MS", 0))
     elif event == "stopped":
         state.is_playing = False
         state.is_streaming = False
         state.current_track = None
+        bot.track_unplayed = False
+    elif event in ("session_connected", "session_client_changed"):
+        state.session_active = True
+    elif event == "session_disconnected":
+        state.session_active = False
+        state.is_playing = False
     elif event == "volume_changed":
         state.volume = int(data.get("VOLUME", 100))
     elif event == "shuffle_changed":
@@ -207,4 +324,8 @@ async def _handle_librespot_event(request: web.Request) -> web.Response:
     elif event == "repeat_changed":
         state.repeat = data.get("REPEAT", "off")
 
+    # Every event that changes current_track or is_playing, which the presence shows
+    if event in ("track_changed", "playing", "paused", "stopped", "session_disconnected"):
+        bot.presence.notify()
+
     return web.json_response({"ok": True})
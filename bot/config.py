@@ -1,28 +1,251 @@
 import json
 import logging
 import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, field, fields, replace
 from pathlib import Path
+from typing import Callable
 
 log = logging.getLogger(__name__)
 
 CONFIG_DIR = Path.home() / ".config" / "pyjockie"
 CONFIG_FILE = CONFIG_DIR / "config.json"
 
+BITRATES = (96, 160, 320)  # quality tiers librespot accepts for --bitrate
 
-def load_config() -> dict:
-    """Load config from ~/.config/pyjockie/config.json."""
+
+@dataclass(frozen=True)
+class Settings:
+    """Runtime tunables, read from config.json with environment overrides.
+
+    Fields marked restart=True are only picked up when the process (or the
+    subprocess they configure) next starts; everything else applies live.
+    """
+    fifo_path: str = field(default="/tmp/pyjockie.fifo", metadata={"env": "FIFO_PATH", "restart": True})
+    event_port: int = field(default=8080, metadata={"env": "EVENT_PORT", "restart": True})
+    librespot_bitrate: int = field(default=320, metadata={"restart": True})
+    # Read buffer on ffmpeg's stdout pipe, in 20ms frames (bufsize = frames * FRAME_SIZE).
+    # Only used when ffmpeg is (re)started. The OS pipe itself holds ~64 KiB, so values
+    # above 17 frames can't buffer any more audio; the default matches io's 8 KiB.
+    buffer_frames: int = field(default=2, metadata={"restart": True})
+    max_restart_attempts: int = 5
+    restart_backoff_secs: float = 1.0
+    restart_window_secs: float = 10.0
+    log_level: str = "INFO"
+    gateway_profile: str = field(default="lean", metadata={"env": "GATEWAY_PROFILE", "restart": True})
+    presence_window_secs: float = field(default=10.0, metadata={"env": "PRESENCE_WINDOW_SECS"})
+    history_db: str = field(
+        default=str(CONFIG_DIR / "history.db"), metadata={"env": "HISTORY_DB", "restart": True}
+    )
+
+    def __post_init__(self):
+        checks = {
+            "event_port": 0 < self.event_port < 65536,
+            "librespot_bitrate": self.librespot_bitrate in BITRATES,
+            "buffer_frames": 1 <= self.buffer_frames <= 17,
+            "max_restart_attempts": self.max_restart_attempts >= 1,
+            "restart_backoff_secs": 0 <= self.restart_backoff_secs <= 60,
+            "restart_window_secs": self.restart_window_secs > 0,
+            "log_level": self.log_level in logging.getLevelNamesMapping(),
+            "gateway_profile": self.gateway_profile in ("lean", "full"),
+            "presence_window_secs": self.presence_window_secs >= 0,
+            "fifo_path": bool(self.fifo_path),
+            "history_db": bool(self.history_db),
+        }
+        for name, ok in checks.items():
+            if not ok:
+                raise ValueError(f"Invalid setting {name}: {getattr(self, name)!r}")
+
+    @classmethod
+    def from_config(cls, config: dict) -> "Settings":
+        """Build settings from a config dict, applying environment overrides.
+
+        Raises ValueError if the config dict is invalid. An invalid environment
+        override is logged and ignored, keeping the value from the config dict.
+        """
+        values = {}
+        for f in fields(cls):
+            value = _check_type(f.name, f.type, config.get(f.name, f.default))
+            values[f.name] = value.upper() if f.name == "log_level" else value
+        settings = cls(**values)
+
+        for f in fields(cls):
+            env = f.metadata.get("env")
+            raw = os.environ.get(env) if env else None
+            if raw is None:
+                continue
+            # Environment values are always strings; parse them strictly
+            try:
+                settings = replace(settings, **{f.name: f.type(raw)})
+            except ValueError as e:
+                log.error("Ignoring environment variable %s=%r: %s", env, raw, e)
+        return settings
+
+
+def _check_type(name: str, kind: type, raw):
+    """Validate a JSON value against a setting's type without coercing it."""
+    if isinstance(raw, bool):
+        pass
+    elif kind is int:
+        if isinstance(raw, int):
+            return raw
+        if isinstance(raw, float) and raw.is_integer():
+            return int(raw)
+    elif kind is float:
+        if isinstance(raw, (int, float)):
+            return float(raw)
+    elif isinstance(raw, kind):
+        return raw
+    raise ValueError(f"Invalid setting {name}: {raw!r} (expected {kind.__name__})")
+
+
+def librespot_bitrate_for(channel_bitrate: int | None, ceiling: int = 320) -> int:
+    """Lowest librespot quality tier (kbps) above the voice channel's bitrate (bps).
+
+    Discord re-encodes to the channel's Opus bitrate, so anything above that is
+    downloaded and decoded for nothing. Never exceeds ceiling.
+    """
+    if channel_bitrate is None:
+        return ceiling
+    for tier in BITRATES:
+        if tier * 1000 > channel_bitrate or tier >= ceiling:
+            return min(tier, ceiling)
+    return ceiling
+
+
+_lock = threading.Lock()
+_config: dict | None = None
+_settings: Settings | None = None
+_listeners: list[Callable[[Settings, Settings], None]] = []
+_watcher: threading.Thread | None = None
+
+
+def _read_config() -> dict:
     if CONFIG_FILE.exists():
         with open(CONFIG_FILE) as f:
-            return json.load(f)
+            config = json.load(f)
+        if not isinstance(config, dict):
+            raise ValueError(f"expected a JSON object, got {type(config).__name__}")
+        return config
     return {}
 
 
+def load_config() -> dict:
+    """Load config from ~/.config/pyjockie/config.json (read once, then cached)."""
+    global _config
+    with _lock:
+        if _config is None:
+            _config = _read_config()
+        return dict(_config)
+
+
 def save_config(config: dict) -> None:
-    """Save config to ~/.config/pyjockie/config.json."""
+    """Atomically save config to ~/.config/pyjockie/config.json."""
     CONFIG_DIR.mkdir(parents=True, exist_ok=True)
-    with open(CONFIG_FILE, "w") as f:
-        json.dump(config, f, indent=2)
+    fd, tmp = tempfile.mkstemp(dir=CONFIG_DIR, prefix=".config.", suffix=".json")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(config, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, CONFIG_FILE)
+    except BaseException:
+        os.unlink(tmp)
+        raise
     log.info("Config saved to %s", CONFIG_FILE)
+    _apply(dict(config))
+
+
+def get_settings() -> Settings:
+    """Current validated settings. Falls back to defaults (plus environment overrides)
+    if config.json is invalid."""
+    global _settings
+    if _settings is None:
+        try:
+            config = load_config()
+        except (OSError, ValueError) as e:  # includes json.JSONDecodeError
+            log.error("Could not read %s: %s; using defaults", CONFIG_FILE, e)
+            config = {}
+        with _lock:
+            if _settings is None:
+                try:
+                    _settings = Settings.from_config(config)
+                except ValueError as e:
+                    log.error("%s in %s; using defaults", e, CONFIG_FILE)
+                    _settings = Settings.from_config({})
+    return _settings
+
+
+def on_settings_changed(callback: Callable[[Settings, Settings], None]) -> None:
+    """Register callback(old, new), called after a reload changes any setting."""
+    _listeners.append(callback)
+
+
+def reload_config() -> None:
+    """Re-read config.json and apply it. Invalid files are logged and ignored."""
+    try:
+        config = _read_config()
+    except (OSError, ValueError) as e:  # includes json.JSONDecodeError
+        log.error("Could not reload %s: %s", CONFIG_FILE, e)
+        return
+    _apply(config)
+
+
+def _apply(config: dict) -> None:
+    global _config, _settings
+    try:
+        new = Settings.from_config(config)
+    except ValueError as e:
+        log.error("%s in %s; keeping current settings", e, CONFIG_FILE)
+        with _lock:
+            _config = config
+        return
+
+    old = get_settings()
+    with _lock:
+        _config = config
+        _settings = new
+    if new == old:
+        return
+
+    for f in fields(Settings):
+        before, after = getattr(old, f.name), getattr(new, f.name)
+        if before != after:
+            when = "after restart" if f.metadata.get("restart") else "now"
+            log.info("Setting %s changed %r -> %r (applies %s)", f.name, before, after, when)
+    for callback in _listeners:
+        try:
+            callback(old, new)
+        except Exception:
+            log.exception("Settings listener failed")
+
+
+def watch_config(interval: float = 2.0) -> None:
+    """Start a background thread that reloads config.json when it changes."""
+    global _watcher
+    if _watcher and _watcher.is_alive():
+        return
+
+    def stamp():
+        try:
+            st = CONFIG_FILE.stat()
+            return st.st_mtime_ns, st.st_size
+        except FileNotFoundError:
+            return None
+
+    def run():
+        last = stamp()
+        while True:
+            time.sleep(interval)
+            current = stamp()
+            if current != last:
+                last = current
+                reload_config()
+
+    _watcher = threading.Thread(target=run, daemon=True, name="config-watcher")
+    _watcher.start()
 
 
 def get_discord_token() -> str | None:
@@ -0,0 +1,206 @@
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from collections import Counter, deque
+from contextlib import closing
+from dataclasses import dataclass
+from pathlib import Path
+
+from state import TrackInfo
+
+log = logging.getLogger(__name__)
+
+TAIL_SIZE = 50  # recent plays kept in memory per guild
+BATCH_SIZE = 500
+FLUSH_INTERVAL_SECS = 1.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS plays (
+    id INTEGER PRIMARY KEY,
+    guild_id INTEGER NOT NULL,
+    played_at REAL NOT NULL,
+    name TEXT NOT NULL,
+    artists TEXT NOT NULL,
+    album TEXT NOT NULL,
+    duration_ms INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS plays_guild_time ON plays (guild_id, played_at);
+CREATE INDEX IF NOT EXISTS plays_guild_artist ON plays (guild_id, artists);
+CREATE INDEX IF NOT EXISTS plays_time ON plays (played_at);
+
+-- Running per-artist totals so /top never has to aggregate the plays table
+CREATE TABLE IF NOT EXISTS artist_plays (
+    guild_id INTEGER NOT NULL,
+    artists TEXT NOT NULL,
+    plays INTEGER NOT NULL,
+    PRIMARY KEY (guild_id, artists)
+);
+CREATE INDEX IF NOT EXISTS artist_plays_rank ON artist_plays (guild_id, plays);
+"""
+
+
+@dataclass(slots=True)
+class PlayRecord:
+    guild_id: int
+    played_at: float
+    name: str
+    artists: str
+    album: str
+    duration_ms: int
+
+
+class PlayHistory:
+    """Append-only, per-guild record of played tracks backed by SQLite.
+
+    record() never touches disk: it appends to an in-memory tail and hands the
+    play to a writer thread, which inserts in batches. Reads are meant to be
+    run off the event loop (e.g. with asyncio.to_thread).
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        batch_size: int = BATCH_SIZE,
+        flush_interval: float = FLUSH_INTERVAL_SECS,
+    ):
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue[PlayRecord | None] = queue.Queue()
+        self._tails: dict[int, deque[PlayRecord]] = {}
+        self._lock = threading.Lock()
+        self._writer: threading.Thread | None = None
+
+    def start(self):
+        """Create the schema and start the background writer."""
+        if self._writer and self._writer.is_alive():
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+        writer = threading.Thread(target=self._run_writer, daemon=True, name="history-writer")
+        writer.start()
+        with self._lock:
+            self._writer = writer
+        log.info("Play history at %s", self.path)
+
+    def close(self):
+        """Flush pending plays and stop the writer."""
+        with self._lock:
+            # Detach first so record() stops queueing behind the sentinel
+            writer, self._writer = self._writer, None
+        if writer and writer.is_alive():
+            self._queue.put(None)
+            writer.join()
+
+    @property
+    def running(self) -> bool:
+        """Whether plays are being recorded, i.e. start() succeeded and close() hasn't run."""
+        return self._writer is not None
+
+    def record(self, guild_id: int, track: TrackInfo, played_at: float | None = None):
+        """Queue a play. Cheap enough to call from the event handler; a no-op unless running."""
+        play = PlayRecord(
+            guild_id=guild_id,
+            played_at=time.time() if played_at is None else played_at,
+            name=track.name,
+            artists=track.artists,
+            album=track.album,
+            duration_ms=track.duration_ms,
+        )
+        with self._lock:
+            if self._writer is None:
+                return
+            tail = self._tails.get(guild_id)
+            if tail is None:
+                tail = self._tails[guild_id] = deque(maxlen=TAIL_SIZE)
+            tail.append(play)
+            self._queue.put(play)
+
+    def flush(self):
+        """Block until every queued play has been written."""
+        self._queue.join()
+
+    def recent(self, guild_id: int, limit: int = 10) -> list[PlayRecord]:
+        """Most recent plays in a guild, newest first."""
+        with self._lock:
+            plays = list(reversed(self._tails.get(guild_id, ())))[:limit]
+        if len(plays) >= limit:
+            return plays
+
+        # Older than anything in the tail. The tail holds the newest TAIL_SIZE plays, so
+        # anything older has long been flushed; the played_at filter skips tail rows on disk
+        before = plays[-1].played_at if plays else float("inf")
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                "SELECT guild_id, played_at, name, artists, album, duration_ms FROM plays"
+                " WHERE guild_id = ? AND played_at < ? ORDER BY played_at DESC LIMIT ?",
+                (guild_id, before, limit - len(plays)),
+            ).fetchall()
+        return plays + [PlayRecord(*row) for row in rows]
+
+    def top_artists(self, guild_id: int, limit: int = 10) -> list[tuple[str, int]]:
+        """Most played artists in a guild as (artists, plays), including flushed plays only."""
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                "SELECT artists, plays FROM artist_plays"
+                " WHERE guild_id = ? ORDER BY plays DESC LIMIT ?",
+                (guild_id, limit),
+            ).fetchall()
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=10.0)
+
+    def _run_writer(self):
+        conn = self._connect()
+        # WAL keeps NORMAL durable against app crashes; only power loss can drop the last batch
+        conn.execute("PRAGMA synchronous=NORMAL")
+        try:
+            while True:
+                batch, stop = self._next_batch()
+                if batch:
+                    try:
+                        self._write(conn, batch)
+                    except sqlite3.Error:
+                        log.exception("Failed to write %d play(s) to history", len(batch))
+                    for _ in batch:
+                        self._queue.task_done()
+                if stop:
+                    self._queue.task_done()
+                    return
+        finally:
+            conn.close()
+
+    def _next_batch(self) -> tuple[list[PlayRecord], bool]:
+        """Wait for a play, then gather more until the batch is full or the interval ends."""
+        first = self._queue.get()
+        if first is None:
+            return [], True
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                play = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                break
+            if play is None:
+                return batch, True
+            batch.append(play)
+        return batch, False
+
+    def _write(self, conn: sqlite3.Connection, batch: list[PlayRecord]):
+        counts = Counter((p.guild_id, p.artists) for p in batch)
+        with conn:
+            conn.executemany(
+                "INSERT INTO plays (guild_id, played_at, name, artists, album, duration_ms)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                [(p.guild_id, p.played_at, p.name, p.artists, p.album, p.duration_ms) for p in batch],
+            )
+            conn.executemany(
+                "INSERT INTO artist_plays (guild_id, artists, plays) VALUES (?, ?, ?)"
+                " ON CONFLICT (guild_id, artists) DO UPDATE SET plays = plays + excluded.plays",
+                [(guild_id, artists, n) for (guild_id, artists), n in counts.items()],
+            )
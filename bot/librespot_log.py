@@ -0,0 +1,189 @@
+import logging
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import BinaryIO
+
+from state import StreamHealth, state
+
+log = logging.getLogger("pyjockie.librespot")
+
+READ_BLOCK_SIZE = 64 * 1024
+RING_SIZE = 500
+EVENT_RING_SIZE = 100
+# Unrecognised lines: allow bursts of LOG_BURST, refilling at LOG_RATE lines/sec
+LOG_BURST = 20
+LOG_RATE = 2.0
+# How often to log how many lines the rate limiter held back
+SUPPRESSED_REPORT_SECS = 60.0
+
+# env_logger format: "[2024-05-01T12:00:00Z INFO  librespot_playback::player] message"
+_LINE_RE = re.compile(r"^\[\S+\s+(?P<level>[A-Z]+)\s+(?P<target>[^\]]+)\]\s?(?P<msg>.*)$")
+_TRACK_LOADED_RE = re.compile(r"^<(?P<name>.*)> \((?P<duration_ms>\d+) ms\) loaded")
+_UNDERRUN_RE = re.compile(r"underrun", re.IGNORECASE)
+# librespot connects to an access point once at startup; any further connect is a reconnect
+_AP_CONNECT_RE = re.compile(r"connecting to ap", re.IGNORECASE)
+_DISCONNECT_RE = re.compile(
+    r"connection to server closed|connection reset|session invalidated",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class LogEvent:
+    kind: str  # "track_loaded", "underrun", "disconnect", "reconnect" or "error"
+    message: str
+    timestamp: float
+
+
+class _RateLimiter:
+    """Token bucket that also counts how many calls it turned away."""
+
+    def __init__(self, burst: int, rate: float):
+        self.burst = burst
+        self.rate = rate
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self.suppressed = 0
+
+    def allow(self) -> bool:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+        if self._tokens >= 1.0:
+            self._tokens -= 1.0
+            return True
+        self.suppressed += 1
+        return False
+
+    def take_suppressed(self) -> int:
+        count, self.suppressed = self.suppressed, 0
+        return count
+
+
+class LibrespotLogIngestor:
+    """Turns librespot --verbose stderr into health counters instead of a log line per line.
+
+    Known lines (track loads, underruns, disconnects, reconnects, errors) become
+    LogEvents and bump counters on state.health. Every raw line lands in a bounded
+    ring that can be dumped with recent_lines(); only a rate-limited sample reaches
+    the logger. One ingestor is reused across librespot restarts so the ring survives.
+    """
+
+    def __init__(
+        self,
+        health: StreamHealth | None = None,
+        ring_size: int = RING_SIZE,
+        log_burst: int = LOG_BURST,
+        log_rate: float = LOG_RATE,
+    ):
+        self.health = health if health is not None else state.health
+        self._lines: deque[str] = deque(maxlen=ring_size)
+        self._events: deque[LogEvent] = deque(maxlen=EVENT_RING_SIZE)
+        self._ap_connects = 0
+        self._last_report = time.monotonic()
+        self._lock = threading.Lock()
+        self._other_limiter = _RateLimiter(log_burst, log_rate)
+        self._event_limiter = _RateLimiter(log_burst, log_rate)
+
+    def run(self, stream: BinaryIO):
+        """Read one librespot process's stderr in blocks until EOF. Run on a background thread."""
+        self._ap_connects = 0
+        read = getattr(stream, "read1", stream.read)
+        partial = b""
+        try:
+            while True:
+                chunk = read(READ_BLOCK_SIZE)
+                if not chunk:
+                    break
+                lines = (partial + chunk).split(b"\n")
+                partial = lines.pop()
+                for line in lines:
+                    self._ingest(line)
+        except (OSError, ValueError):
+            # Pipe closed underneath us while librespot was being stopped
+            pass
+        if partial:
+            self._ingest(partial)
+        self._report_suppressed()
+
+    def recent_lines(self) -> list[str]:
+        """Most recent raw librespot lines, oldest first."""
+        with self._lock:
+            return list(self._lines)
+
+    def recent_events(self) -> list[LogEvent]:
+        """Most recent structured events, oldest first."""
+        with self._lock:
+            return list(self._events)
+
+    def _ingest(self, line: bytes):
+        text = line.decode("utf-8", errors="replace").rstrip()
+        if not text:
+            return
+
+        with self._lock:
+            self._lines.append(text)
+        self.health.librespot_lines += 1
+        if time.monotonic() - self._last_report >= SUPPRESSED_REPORT_SECS:
+            self._report_suppressed()
+
+        match = _LINE_RE.match(text)
+        level, msg = (match["level"], match["msg"]) if match else ("", text)
+
+        loaded = _TRACK_LOADED_RE.match(msg)
+        if loaded:
+            self.health.tracks_loaded += 1
+            self._record("track_loaded", msg)
+            log.info("[librespot] loaded %s (%s ms)", loaded["name"], loaded["duration_ms"])
+            return
+
+        if _UNDERRUN_RE.search(msg):
+            self.health.librespot_underruns += 1
+            self._record("underrun", msg)
+            self._log_event(logging.WARNING, msg)
+        elif _DISCONNECT_RE.search(msg):
+            self.health.librespot_disconnects += 1
+            self._record("disconnect", msg)
+            self._log_event(logging.WARNING, msg)
+        elif _AP_CONNECT_RE.search(msg) and self._ap_connects > 0:
+            self._ap_connects += 1
+            self.health.librespot_reconnects += 1
+            self._record("reconnect", msg)
+            self._log_event(logging.WARNING, msg)
+        elif _AP_CONNECT_RE.search(msg):
+            self._ap_connects += 1
+            log.info("[librespot] %s", msg)
+        elif level == "ERROR":
+            self.health.librespot_errors += 1
+            self.health.last_error = msg
+            self._record("error", msg)
+            self._log_event(logging.ERROR, msg)
+        elif self._other_limiter.allow():
+            log.info("[librespot] %s", text)
+        else:
+            self.health.librespot_lines_suppressed += 1
+
+    def _report_suppressed(self):
+        now = time.monotonic()
+        suppressed = self._other_limiter.take_suppressed() + self._event_limiter.take_suppressed()
+        if suppressed:
+            log.info("[librespot] %d line(s) not logged in the last %.0fs (rate limited)",
+                     suppressed, now - self._last_report)
+        self._last_report = now
+
+    def _record(self, kind: str, msg: str):
+        with self._lock:
+            self._events.append(LogEvent(kind=kind, message=msg, timestamp=time.time()))
+
+    def _log_event(self, level: int, msg: str):
+        if not self._event_limiter.allow():
+            self.health.librespot_lines_suppressed += 1
+            return
+        suppressed = self._event_limiter.take_suppressed()
+        if suppressed:
+            log.log(level, "[librespot] %s (+%d similar not logged)", msg, suppressed)
+        else:
+            log.log(level, "[librespot] %s", msg)
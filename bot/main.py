@@ -22,24 +22,28 @@ if not discord.opus.is_loaded():
             continue
 
 from bot import bot, configure
+from config import get_settings, on_settings_changed, watch_config
 
 logging.basicConfig(
-    level=logging.INFO,
+    level=get_settings().log_level,
     format="%(asctime)s [%(levelname)s] %(name)s: %(message)s",
 )
 log = logging.getLogger("pyjockie")
+on_settings_changed(lambda old, new: logging.getLogger().setLevel(new.log_level))
 
 
-def run_bot(token: str, fifo_path: str = "/tmp/pyjockie.fifo", event_port: int = 8080):
+def run_bot(token: str, fifo_path: str | None = None, event_port: int | None = None):
     """Start the Discord bot. Blocks until the bot stops."""
     configure(fifo_path=fifo_path, event_port=event_port)
+    watch_config()
     log.info("Starting PyJockie bot...")
     bot.run(token, log_handler=None)
 
 
-def run_bot_async(token: str, fifo_path: str = "/tmp/pyjockie.fifo", event_port: int = 8080):
+def run_bot_async(token: str, fifo_path: str | None = None, event_port: int | None = None):
     """Start the Discord bot in a new asyncio event loop. For use from a background thread."""
     configure(fifo_path=fifo_path, event_port=event_port)
+    watch_config()
     log.info("Starting PyJockie bot (async)...")
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
@@ -58,9 +62,7 @@ def main():
         log.error("DISCORD_TOKEN environment variable is required")
         sys.exit(1)
 
-    fifo_path = os.environ.get("FIFO_PATH", "/tmp/pyjockie.fifo")
-    event_port = int(os.environ.get("EVENT_PORT", "8080"))
-    run_bot(token, fifo_path, event_port)
+    run_bot(token)
 
 
 if __name__ == "__main__":
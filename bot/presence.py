@@ -0,0 +1,91 @@
+import asyncio
+import logging
+
+import discord
+
+from state import AppState, state
+
+log = logging.getLogger(__name__)
+
+
+def _presence_key(app_state: AppState) -> tuple[str, str] | None:
+    """The part of the state that is visible in the bot's presence."""
+    track = app_state.current_track
+    if not track or not track.name:
+        return None
+    name = f"{track.name} — {track.artists}" if track.artists else track.name
+    return ("playing" if app_state.is_playing else "paused", name)
+
+
+class PresencePublisher:
+    """Mirrors the current track into the bot's rich presence.
+
+    notify() only sets a flag, so it is safe to call on every player event.
+    A background task sends at most one presence update per window, using
+    whatever the state is when the window closes, and skips the send when
+    the visible presence would not change.
+    """
+
+    def __init__(self, client: discord.Client, window: float):
+        self._client = client
+        self.window = window
+        # Created in start() so it belongs to the loop the bot is running on now
+        self._wake: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._last_key: tuple[str, str] | None = None
+        self._last_sent: float = float("-inf")
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._wake = asyncio.Event()
+            self._wake.set()  # publish whatever is current once ready
+            self._last_key = None  # a new gateway session starts with no presence
+            self._task = asyncio.create_task(self._run(), name="presence-publisher")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def notify(self):
+        """Mark the presence as possibly stale."""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def _run(self):
+        await self._client.wait_until_ready()
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._wake.wait()
+
+            # Let the rest of a burst (e.g. rapid skipping) pile up until the window closes
+            delay = self._last_sent + self.window - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._wake.clear()
+
+            key = _presence_key(state)
+            if key == self._last_key:
+                continue
+
+            if key is None:
+                activity = None
+            else:
+                status, name = key
+                activity = discord.Activity(
+                    type=discord.ActivityType.listening,
+                    name=name if status == "playing" else f"{name} (paused)",
+                )
+            try:
+                await self._client.change_presence(activity=activity)
+            except Exception:
+                log.exception("Failed to update presence")
+                # Retry after the next window even if no further player event arrives
+                self._wake.set()
+            else:
+                self._last_key = key
+            self._last_sent = loop.time()
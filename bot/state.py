@@ -11,10 +11,25 @@ class TrackInfo:
     duration_ms: int = 0
 
 
+@dataclass
+class StreamHealth:
+    """Counters describing the health of the librespot → ffmpeg → Discord pipeline."""
+    tracks_loaded: int = 0
+    librespot_underruns: int = 0
+    librespot_disconnects: int = 0
+    librespot_reconnects: int = 0
+    librespot_errors: int = 0
+    librespot_lines: int = 0
+    librespot_lines_suppressed: int = 0
+    ffmpeg_restarts: int = 0
+    last_error: str = ""
+
+
 @dataclass
 class AppState:
     is_playing: bool = False
     is_streaming: bool = False
+    session_active: bool = False  # a Spotify Connect client has PyJockie selected
     current_track: Optional[TrackInfo] = None
     position_ms: int = 0
     volume: int = 100
@@ -22,7 +37,10 @@ class AppState:
     repeat: str = "off"
 
     voice_channel_id: Optional[int] = None
+    voice_bitrate: Optional[int] = None  # bps, as reported by Discord
     guild_id: Optional[int] = None
 
+    health: StreamHealth = field(default_factory=StreamHealth)
+
 
 state = AppState()
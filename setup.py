@@ -32,7 +32,10 @@ OPTIONS = {
         "bot/audio.py",
         "bot/bot.py",
         "bot/config.py",
+        "bot/history.py",
+        "bot/librespot_log.py",
         "bot/main.py",
+        "bot/presence.py",
         "bot/state.py",
     ],
 }